@@ -6,13 +6,81 @@ Provides common mobile interactions and gestures
 from appium import webdriver
 from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from appium.webdriver.common.touch_action import TouchAction
-from typing import Tuple, Optional
+from selenium.common.exceptions import (
+    TimeoutException,
+    NoSuchElementException,
+    InvalidArgumentException,
+    StaleElementReferenceException,
+    UnknownMethodException,
+    WebDriverException,
+)
+from typing import Callable, Dict, Tuple, Optional
 from loguru import logger
+import threading
 import time
 
+from framework.utils.capabilities import get_capability
+
+
+# Poll twice as often as Selenium's 0.5s default
+POLL_FREQUENCY = 0.25
+
+
+def _is_unsupported_command(error: WebDriverException) -> bool:
+    """Tell whether an error means the driver lacks a 'mobile:' command."""
+    if isinstance(error, (UnknownMethodException, InvalidArgumentException)):
+        return True
+    message = (error.msg or '').lower()
+    return 'unknown command' in message or 'unknown mobile command' in message
+
+
+# Returned by _native_scroll_to when its answer can't be trusted and
+# scroll_to_element should swipe step by step instead
+_USE_SWIPES = object()
+
+
+def _quote(value: str) -> str:
+    """Wrap value in double quotes for a UiSelector or NSPredicate."""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _to_uiselector(locator: Tuple[str, str]) -> Optional[str]:
+    """
+    Convert a locator to a UiSelector expression, if it maps onto one.
+    
+    Returns:
+        UiSelector Java expression, or None (e.g. for XPath)
+    """
+    by, value = locator
+    if by == AppiumBy.ANDROID_UIAUTOMATOR:
+        return value
+    if by == AppiumBy.ID:
+        if ':id/' in value:
+            return f"new UiSelector().resourceId({_quote(value)})"
+        return f"new UiSelector().resourceIdMatches({_quote('.*:id/' + value)})"
+    if by == AppiumBy.ACCESSIBILITY_ID:
+        return f"new UiSelector().description({_quote(value)})"
+    if by == AppiumBy.CLASS_NAME:
+        return f"new UiSelector().className({_quote(value)})"
+    return None
+
+
+def _to_ios_predicate(locator: Tuple[str, str]) -> Optional[str]:
+    """
+    Convert a locator to an NSPredicate string, if it maps onto one.
+    
+    Returns:
+        Predicate string, or None (e.g. for XPath)
+    """
+    by, value = locator
+    if by == AppiumBy.IOS_PREDICATE:
+        return value
+    if by in (AppiumBy.ID, AppiumBy.ACCESSIBILITY_ID, AppiumBy.NAME):
+        return f"name == {_quote(value)}"
+    if by == AppiumBy.CLASS_NAME:
+        return f"type == {_quote(value)}"
+    return None
+
 
 class BasePage:
     """
@@ -33,14 +101,88 @@ class BasePage:
             driver: Appium Remote WebDriver instance
         """
         self.driver = driver
-        self.wait = WebDriverWait(driver, 10)
-        self.touch = TouchAction(driver)
+        self.wait = WebDriverWait(driver, 10, poll_frequency=POLL_FREQUENCY)
+        # Platform is fixed for the session - check once, branch on a bool
+        caps = driver.capabilities
+        self._is_ios = str(get_capability(caps, 'platformName', '')).lower() == 'ios'
+        self._app_id = get_capability(caps, 'bundleId') or get_capability(caps, 'appPackage')
+        self._native_gestures = True
+        self._window_size = None
+        self._swipe_coords: Dict[str, Tuple[int, int, int, int]] = {}
+        self._swipe_area: Dict[str, int] = {}
+        # DriverManager fetches the size when it pre-warms the session
+        if getattr(driver, '_cached_window_size', None):
+            self._window_size = driver._cached_window_size
+            self._compute_swipe_points()
+    
+    def _poll(
+        self,
+        condition: Callable,
+        timeout: float,
+        *args,
+        done: Callable = bool,
+        raise_on_timeout: bool = True
+    ):
+        """
+        Call condition(*args) until done(result) is true.
+        
+        Stale element errors count as "not yet". Checks at least once,
+        even with a zero timeout.
+        
+        Args:
+            done: Decides whether a result is good enough (default: truthy)
+            raise_on_timeout: If False, return the last result on timeout
+                instead of raising
+        
+        Returns:
+            The condition's result
+        
+        Raises:
+            TimeoutException if the deadline passes first
+        """
+        deadline = time.monotonic() + timeout
+        result = None
+        while True:
+            try:
+                result = condition(*args)
+                if done(result):
+                    return result
+            except StaleElementReferenceException:
+                pass
+            if time.monotonic() >= deadline:
+                if not raise_on_timeout:
+                    return result
+                raise TimeoutException(f"Condition not met within {timeout}s: {args[0]}")
+            time.sleep(POLL_FREQUENCY)
+    
+    def _present_element(self, locator: Tuple[str, str]):
+        elements = self.driver.find_elements(*locator)
+        return elements[0] if elements else None
+    
+    def _visible_element(self, locator: Tuple[str, str]):
+        elements = self.driver.find_elements(*locator)
+        if elements and elements[0].is_displayed():
+            return elements[0]
+        return None
+    
+    def _clickable_element(self, locator: Tuple[str, str]):
+        elements = self.driver.find_elements(*locator)
+        if elements and elements[0].is_displayed() and elements[0].is_enabled():
+            return elements[0]
+        return None
+    
+    def _element_has_text(self, locator: Tuple[str, str], text: str) -> bool:
+        elements = self.driver.find_elements(*locator)
+        return bool(elements) and text in elements[0].text
     
     # Element Finding
     def find_element(self, locator: Tuple[str, str], timeout: int = 10):
         """
         Find element with explicit wait.
         
+        DriverManager sets the implicit wait to 0, so all waiting
+        happens here by polling find_elements.
+        
         Args:
             locator: Tuple of (by, value) like (AppiumBy.ID, "com.app:id/button")
             timeout: Max wait time in seconds
@@ -52,42 +194,81 @@ class BasePage:
             TimeoutException if not found
         """
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located(locator)
-            )
-            logger.debug(f"Found element: {locator}")
+            element = self._poll(self._present_element, timeout, locator)
+            logger.debug("Found element: {}", locator)
             return element
         except TimeoutException:
             logger.error(f"Element not found: {locator}")
             raise
     
-    def find_elements(self, locator: Tuple[str, str]):
+    def find_elements(
+        self,
+        locator: Tuple[str, str],
+        timeout: float = 0,
+        min_count: int = 1
+    ):
         """
         Find multiple elements.
         
+        With the default timeout of 0 this is a single call with no
+        waiting - returns an empty list right away if nothing matches
+        (implicit wait is 0). With a timeout, polls until at least
+        min_count elements are found.
+        
         Args:
             locator: Tuple of (by, value)
+            timeout: Max wait time in seconds
+            min_count: How many elements to wait for
         
         Returns:
-            List of WebElements
+            List of WebElements (may be short if the timeout ran out)
         """
-        return self.driver.find_elements(*locator)
+        if timeout <= 0 or min_count <= 0:
+            return self.driver.find_elements(*locator)
+        
+        return self._poll(
+            self.driver.find_elements, timeout, *locator,
+            done=lambda elements: len(elements) >= min_count,
+            raise_on_timeout=False
+        )
+    
+    def find_many(self, locators: Dict[str, Tuple[str, str]]) -> Dict[str, Optional[object]]:
+        """
+        Find several named elements, e.g. everything a screen asserts on.
+        
+        One find_elements call per locator, in order, with no waiting -
+        each locator is checked once and misses come back as None
+        instead of raising.
+        
+        Args:
+            locators: Name -> locator, like {'title': (AppiumBy.ID, "...")}
+        
+        Returns:
+            Name -> first matching element, or None if nothing matched
+        """
+        found = {name: self._present_element(locator) for name, locator in locators.items()}
+        logger.debug("Looked up {} locators", len(found))
+        return found
     
-    def is_element_present(self, locator: Tuple[str, str], timeout: int = 5) -> bool:
+    def is_element_present(self, locator: Tuple[str, str], timeout: float = 5) -> bool:
         """
         Check if element exists without throwing exception.
         
+        With timeout 0 this is a single find_elements call (empty list,
+        no exception), so a miss costs nothing beyond the wire call.
+        
         Args:
             locator: Element locator
-            timeout: How long to wait
+            timeout: How long to wait (0 for a single immediate check)
         
         Returns:
             True if element found, False otherwise
         """
+        if timeout <= 0:
+            return bool(self.driver.find_elements(*locator))
+        
         try:
-            WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located(locator)
-            )
+            self._poll(self._present_element, timeout, locator)
             return True
         except TimeoutException:
             return False
@@ -103,9 +284,32 @@ class BasePage:
         """
         element = self.find_element(locator, timeout)
         element.click()
-        logger.info(f"Tapped element: {locator}")
+        logger.debug("Tapped element: {}", locator)
+    
+    def tap_at(self, x: int, y: int):
+        """
+        Tap screen coordinates with a single native gesture.
+        
+        Skips element lookup entirely - handy when the position is
+        already known. Prefer tap() for anything locatable.
+        
+        Args:
+            x: X coordinate in pixels
+            y: Y coordinate in pixels
+        """
+        if self._is_ios:
+            self.driver.execute_script('mobile: tap', {'x': x, 'y': y})
+        else:
+            self.driver.execute_script('mobile: clickGesture', {'x': x, 'y': y})
+        logger.debug("Tapped at ({}, {})", x, y)
     
-    def send_keys(self, locator: Tuple[str, str], text: str, timeout: int = 10):
+    def send_keys(
+        self,
+        locator: Tuple[str, str],
+        text: str,
+        timeout: int = 10,
+        clear_first: bool = True
+    ):
         """
         Type text into element.
         
@@ -113,11 +317,14 @@ class BasePage:
             locator: Input field locator
             text: Text to type
             timeout: Wait timeout
+            clear_first: Clear the field before typing. Pass False for
+                fields known to be empty to skip the extra round trip.
         """
         element = self.find_element(locator, timeout)
-        element.clear()
+        if clear_first:
+            element.clear()
         element.send_keys(text)
-        logger.info(f"Typed '{text}' into {locator}")
+        logger.debug("Typed '{}' into {}", text, locator)
     
     def get_text(self, locator: Tuple[str, str], timeout: int = 10) -> str:
         """
@@ -134,6 +341,104 @@ class BasePage:
         return element.text
     
     # Mobile-Specific Gestures
+    def _get_window_size(self) -> dict:
+        """
+        Get screen dimensions, fetching from the server only once.
+        
+        Returns:
+            Dict with 'width' and 'height'
+        """
+        if self._window_size is None:
+            self._window_size = self.driver.get_window_size()
+            self.driver._cached_window_size = self._window_size
+            self._compute_swipe_points()
+        return self._window_size
+    
+    def invalidate_window_size(self):
+        """
+        Drop cached screen dimensions.
+        
+        Call this after rotating the device so swipes use the new size.
+        """
+        self._window_size = None
+        self._swipe_coords = {}
+        self._swipe_area = {}
+        self.driver._cached_window_size = None
+    
+    def _compute_swipe_points(self):
+        """
+        Work out swipe endpoints for the cached window size.
+        
+        Swipes run between 20% and 80% of the screen, through the middle.
+        """
+        size = self._window_size
+        mid_x = size['width'] // 2
+        mid_y = size['height'] // 2
+        x20 = int(size['width'] * 0.2)
+        x80 = int(size['width'] * 0.8)
+        y20 = int(size['height'] * 0.2)
+        y80 = int(size['height'] * 0.8)
+        
+        self._swipe_coords = {
+            'up': (mid_x, y80, mid_x, y20),
+            'down': (mid_x, y20, mid_x, y80),
+            'left': (x80, mid_y, x20, mid_y),
+            'right': (x20, mid_y, x80, mid_y),
+        }
+        # Central band the native swipe gesture runs across
+        self._swipe_area = {
+            'left': x20,
+            'top': y20,
+            'width': x80 - x20,
+            'height': y80 - y20,
+        }
+    
+    def _swipe_points(self, direction: str) -> Tuple[int, int, int, int]:
+        """Get (start_x, start_y, end_x, end_y) for a swipe in a direction."""
+        if self._window_size is None:
+            self._get_window_size()
+        return self._swipe_coords[direction]
+    
+    def _swipe(self, direction: str, duration: int):
+        """
+        Swipe in a direction with a single server-side gesture.
+        
+        Uses 'mobile: swipeGesture' (Android) or 'mobile: swipe' (iOS).
+        Falls back to driver.swipe if the driver doesn't support them,
+        and remembers that so later swipes go straight to the fallback.
+        Any other error is raised as usual.
+        
+        Args:
+            direction: 'up', 'down', 'left' or 'right' (finger direction)
+            duration: Swipe duration in milliseconds
+        """
+        if self._native_gestures:
+            start_x, start_y, end_x, end_y = self._swipe_points(direction)
+            distance = abs(end_x - start_x) + abs(end_y - start_y)
+            # Pixels per second covering the swipe distance in duration ms
+            speed = max(distance * 1000 // max(duration, 1), 1)
+            try:
+                if self._is_ios:
+                    self.driver.execute_script('mobile: swipe', {
+                        'direction': direction,
+                        'velocity': speed,
+                    })
+                else:
+                    self.driver.execute_script('mobile: swipeGesture', {
+                        **self._swipe_area,
+                        'direction': direction,
+                        'percent': 1.0,
+                        'speed': speed,
+                    })
+                return
+            except WebDriverException as e:
+                if not _is_unsupported_command(e):
+                    raise
+                logger.warning("Native swipe unsupported, using driver.swipe from now on: {}", e)
+                self._native_gestures = False
+        
+        self.driver.swipe(*self._swipe_points(direction), duration)
+    
     def swipe_up(self, duration: int = 800):
         """
         Swipe up (scroll down).
@@ -141,12 +446,7 @@ class BasePage:
         Args:
             duration: Swipe duration in milliseconds
         """
-        size = self.driver.get_window_size()
-        start_x = size['width'] // 2
-        start_y = int(size['height'] * 0.8)
-        end_y = int(size['height'] * 0.2)
-        
-        self.driver.swipe(start_x, start_y, start_x, end_y, duration)
+        self._swipe('up', duration)
         logger.debug("Swiped up")
     
     def swipe_down(self, duration: int = 800):
@@ -156,12 +456,7 @@ class BasePage:
         Args:
             duration: Swipe duration in milliseconds
         """
-        size = self.driver.get_window_size()
-        start_x = size['width'] // 2
-        start_y = int(size['height'] * 0.2)
-        end_y = int(size['height'] * 0.8)
-        
-        self.driver.swipe(start_x, start_y, start_x, end_y, duration)
+        self._swipe('down', duration)
         logger.debug("Swiped down")
     
     def swipe_left(self, duration: int = 800):
@@ -171,12 +466,7 @@ class BasePage:
         Args:
             duration: Swipe duration in milliseconds
         """
-        size = self.driver.get_window_size()
-        start_x = int(size['width'] * 0.8)
-        start_y = size['height'] // 2
-        end_x = int(size['width'] * 0.2)
-        
-        self.driver.swipe(start_x, start_y, end_x, start_y, duration)
+        self._swipe('left', duration)
         logger.debug("Swiped left")
     
     def swipe_right(self, duration: int = 800):
@@ -186,12 +476,7 @@ class BasePage:
         Args:
             duration: Swipe duration in milliseconds
         """
-        size = self.driver.get_window_size()
-        start_x = int(size['width'] * 0.2)
-        start_y = size['height'] // 2
-        end_x = int(size['width'] * 0.8)
-        
-        self.driver.swipe(start_x, start_y, end_x, start_y, duration)
+        self._swipe('right', duration)
         logger.debug("Swiped right")
     
     def scroll_to_element(
@@ -203,6 +488,15 @@ class BasePage:
         """
         Scroll until element is visible.
         
+        Checks the current screen first, then tries a single native
+        scroll (UiScrollable.scrollIntoView on Android, 'mobile: scroll'
+        on iOS), which searches both ways and ignores direction. Swipes
+        step by step instead if the locator can't be expressed natively,
+        the native command errors, or the iOS search misses ('mobile:
+        scroll' can't reach cells that haven't been created yet). An
+        Android UiScrollable miss is final, since it has already
+        scrolled the whole list.
+        
         Args:
             locator: Element to find
             max_scrolls: Maximum scroll attempts
@@ -211,21 +505,68 @@ class BasePage:
         Returns:
             Element if found, None otherwise
         """
-        for i in range(max_scrolls):
-            if self.is_element_present(locator, timeout=2):
-                logger.info(f"Found element after {i} scrolls")
-                return self.find_element(locator)
-            
+        elements = self.driver.find_elements(*locator)
+        if elements:
+            logger.info("Found element after 0 scrolls")
+            return elements[0]
+        
+        element = self._native_scroll_to(locator, max_scrolls)
+        if element is None:
+            logger.warning(f"Element not found by native scroll: {locator}")
+            return None
+        if element is not _USE_SWIPES:
+            logger.info(f"Found element with native scroll: {locator}")
+            return element
+        
+        for i in range(1, max_scrolls + 1):
+            # swipe blocks for its duration, so no extra pause is needed
             if direction == 'up':
                 self.swipe_up()
             else:
                 self.swipe_down()
             
-            time.sleep(0.5)  # Brief pause between scrolls
+            elements = self.driver.find_elements(*locator)
+            if elements:
+                logger.info(f"Found element after {i} scrolls")
+                return elements[0]
         
         logger.warning(f"Element not found after {max_scrolls} scrolls")
         return None
     
+    def _native_scroll_to(self, locator: Tuple[str, str], max_scrolls: int):
+        """
+        Scroll to an element with one server-side command.
+        
+        Returns:
+            Element if found, None if an Android search ran and found
+            nothing, or _USE_SWIPES if the locator or driver can't do it
+            natively or the iOS search missed
+        """
+        try:
+            if self._is_ios:
+                predicate = _to_ios_predicate(locator)
+                if predicate is None:
+                    return _USE_SWIPES
+                self.driver.execute_script('mobile: scroll', {'predicateString': predicate})
+                elements = self.driver.find_elements(*locator)
+                return elements[0] if elements else _USE_SWIPES
+            else:
+                selector = _to_uiselector(locator)
+                if selector is None:
+                    return _USE_SWIPES
+                elements = self.driver.find_elements(
+                    AppiumBy.ANDROID_UIAUTOMATOR,
+                    "new UiScrollable(new UiSelector().scrollable(true))"
+                    f".setMaxSearchSwipes({max_scrolls})"
+                    f".scrollIntoView({selector})"
+                )
+        except WebDriverException as e:
+            # Includes NoSuchElement from iOS 'mobile: scroll' for cells
+            # not yet in the accessibility tree
+            logger.debug("Native scroll failed, falling back to swipes: {}", e)
+            return _USE_SWIPES
+        return elements[0] if elements else None
+    
     def long_press(self, locator: Tuple[str, str], duration: int = 1000):
         """
         Long press on element.
@@ -235,21 +576,39 @@ class BasePage:
             duration: Press duration in milliseconds
         """
         element = self.find_element(locator)
-        self.touch.long_press(element, duration=duration).perform()
+        if self._is_ios:
+            self.driver.execute_script('mobile: touchAndHold', {
+                'elementId': element.id,
+                'duration': duration / 1000,
+            })
+        else:
+            self.driver.execute_script('mobile: longClickGesture', {
+                'elementId': element.id,
+                'duration': duration,
+            })
         logger.info(f"Long pressed element: {locator}")
     
     def hide_keyboard(self):
         """
         Hide the on-screen keyboard if visible.
         
-        Different approaches for iOS vs Android.
+        Different approaches for iOS vs Android: iOS taps the keyboard's
+        Done/Return key, Android uses the back-key based hide.
+        
+        Hiding is attempted directly rather than checking
+        is_keyboard_shown first - that saves a round trip, and an
+        error just means there was nothing to hide.
         """
         try:
-            if self.driver.is_keyboard_shown():
+            if self._is_ios:
+                self.driver.execute_script('mobile: hideKeyboard', {
+                    'keys': ['Done', 'done', 'Return', 'return'],
+                })
+            else:
                 self.driver.hide_keyboard()
-                logger.debug("Keyboard hidden")
+            logger.debug("Keyboard hidden")
         except Exception as e:
-            logger.debug(f"Could not hide keyboard: {e}")
+            logger.debug("hide_keyboard noop: {}", e)
     
     # Waiting Helpers
     def wait_for_element_visible(
@@ -267,9 +626,7 @@ class BasePage:
         Returns:
             Element when visible
         """
-        return WebDriverWait(self.driver, timeout).until(
-            EC.visibility_of_element_located(locator)
-        )
+        return self._poll(self._visible_element, timeout, locator)
     
     def wait_for_element_clickable(
         self,
@@ -286,9 +643,7 @@ class BasePage:
         Returns:
             Element when clickable
         """
-        return WebDriverWait(self.driver, timeout).until(
-            EC.element_to_be_clickable(locator)
-        )
+        return self._poll(self._clickable_element, timeout, locator)
     
     def wait_for_text(
         self,
@@ -308,9 +663,7 @@ class BasePage:
             True if text found, False otherwise
         """
         try:
-            WebDriverWait(self.driver, timeout).until(
-                EC.text_to_be_present_in_element(locator, expected_text)
-            )
+            self._poll(self._element_has_text, timeout, locator, expected_text)
             return True
         except TimeoutException:
             return False
@@ -327,11 +680,12 @@ class BasePage:
         logger.info(f"Screenshot saved: {filename}")
     
     # App Management
-    def background_app(self, seconds: int = 5):
+    def background_app(self, seconds: int):
         """
         Send app to background for specified time.
         
-        Useful for testing app resumption.
+        Useful for testing app resumption. Blocks for the whole time -
+        see background_app_async to keep working meanwhile.
         
         Args:
             seconds: Time to keep app in background
@@ -339,6 +693,47 @@ class BasePage:
         self.driver.background_app(seconds)
         logger.info(f"App backgrounded for {seconds} seconds")
     
+    def background_app_async(self, seconds: float) -> threading.Timer:
+        """
+        Send app to background and bring it back after a delay, without blocking.
+        
+        Needs appPackage (Android) or bundleId (iOS) in the session
+        capabilities to know which app to reactivate. The pending timer
+        is kept on the driver so DriverManager can cancel it when the
+        session is released - otherwise it could bring the app forward
+        in the middle of the next test using a pooled session.
+        
+        Args:
+            seconds: Time to keep app in background
+        
+        Returns:
+            The resume timer - join() it to wait for the app to return,
+            or cancel() it to leave the app in the background
+        """
+        if not self._app_id:
+            raise ValueError("background_app_async needs appPackage or bundleId in capabilities")
+        
+        pending = getattr(self.driver, '_resume_timer', None)
+        if pending is not None:
+            pending.cancel()
+        
+        self.driver.background_app(-1)
+        timer = threading.Timer(seconds, self._resume_app)
+        timer.daemon = True
+        self.driver._resume_timer = timer
+        timer.start()
+        logger.info(f"App backgrounded, resuming in {seconds} seconds")
+        return timer
+    
+    def _resume_app(self):
+        """Timer callback for background_app_async."""
+        self.driver._resume_timer = None
+        try:
+            self.driver.activate_app(self._app_id)
+            logger.info("App resumed from background")
+        except Exception as e:
+            logger.warning("Could not resume app from background: {}", e)
+    
     def reset_app(self):
         """Reset app to initial state (clears data)."""
         self.driver.reset()
@@ -4,13 +4,61 @@ Handles creating and managing Appium drivers for iOS and Android
 """
 
 from appium import webdriver
+from appium.webdriver.appium_connection import AppiumConnection
 from appium.options.android import UiAutomator2Options
 from appium.options.ios import XCUITestOptions
-from typing import Optional
+from selenium.common.exceptions import WebDriverException
+from typing import Dict, Optional, Tuple
+import atexit
+import copy
+import os
 import yaml
 from pathlib import Path
 from loguru import logger
 
+from framework.utils.capabilities import get_capability
+
+try:
+    import orjson as _json
+except ImportError:  # stdlib fallback - slower, same format
+    import json as _json
+
+# libyaml's C loader when available, pure-Python otherwise
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Capabilities used when neither the config file nor the caller sets them
+_ANDROID_DEFAULTS = {
+    'platformName': 'Android',
+    'automationName': 'UiAutomator2',
+    'deviceName': 'Android Emulator',
+    'newCommandTimeout': 60,
+}
+_IOS_DEFAULTS = {
+    'platformName': 'iOS',
+    'automationName': 'XCUITest',
+    'deviceName': 'iPhone 14',
+    'newCommandTimeout': 60,
+}
+
+
+def _cancel_resume_timer(driver: webdriver.Remote):
+    """Stop a pending BasePage.background_app_async resume, if any."""
+    timer = getattr(driver, '_resume_timer', None)
+    if timer is not None:
+        timer.cancel()
+        driver._resume_timer = None
+
+
+# (config path, platform, device, app) - identifies a poolable session
+_PoolKey = Tuple[str, str, Optional[str], Optional[str]]
+
+# Sockets each driver's connection keeps open. urllib3 defaults to one,
+# so a command sent while another is in flight on the same driver (e.g.
+# from the background_app_async timer) would open and then throw away
+# an extra socket instead of reusing one.
+HTTP_POOL_SIZE = 16
+_POOL_MANAGER_ARGS = {'maxsize': HTTP_POOL_SIZE, 'block': False}
+
 
 class DriverManager:
     """
@@ -20,6 +68,13 @@ class DriverManager:
     capabilities, and connection details.
     """
     
+    # Parsed config files, keyed by resolved path
+    _CONFIG_CACHE: Dict[Path, dict] = {}
+    
+    # Idle sessions from create_driver, keyed by
+    # (config path, platform, device, app)
+    _POOL: Dict[_PoolKey, webdriver.Remote] = {}
+    
     def __init__(self, config_path: str = "config/capabilities.yaml"):
         """
         Initialize with config file path.
@@ -29,17 +84,78 @@ class DriverManager:
         """
         self.config_path = Path(config_path)
         self.driver: Optional[webdriver.Remote] = None
+        self._pool_key: Optional[_PoolKey] = None
         self._load_config()
     
     def _load_config(self):
-        """Load configuration from YAML file."""
+        """
+        Load configuration from YAML file.
+        
+        Each file is parsed once per process; later instances get their
+        own copy of the cached result, so changing self.config on one
+        manager doesn't affect others. Across processes, the parsed config is kept
+        in a JSON file next to the YAML (e.g. capabilities.cache.json)
+        and only re-parsed from YAML when the YAML is newer.
+        """
+        key = self.config_path.resolve()
+        cached = self._CONFIG_CACHE.get(key)
+        if cached is not None:
+            self.config = copy.deepcopy(cached)
+            return
+        
         try:
-            with open(self.config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
-                logger.info(f"Loaded config from {self.config_path}")
+            yaml_mtime = self.config_path.stat().st_mtime
         except FileNotFoundError:
             logger.warning(f"Config file not found: {self.config_path}")
             self.config = {}
+            return
+        
+        cache_path = self.config_path.with_suffix('.cache.json')
+        self.config = self._read_config_cache(cache_path, yaml_mtime)
+        if self.config is None:
+            with open(self.config_path, 'r') as f:
+                self.config = yaml.load(f, Loader=_YAML_LOADER) or {}
+            self._write_config_cache(cache_path, self.config)
+        
+        self._CONFIG_CACHE[key] = copy.deepcopy(self.config)
+        logger.info(f"Loaded config from {self.config_path}")
+    
+    @staticmethod
+    def _read_config_cache(cache_path: Path, yaml_mtime: float) -> Optional[dict]:
+        """Return the cached config if it's at least as new as the YAML."""
+        try:
+            if cache_path.stat().st_mtime < yaml_mtime:
+                return None
+            return _json.loads(cache_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def _write_config_cache(cache_path: Path, config: dict):
+        """
+        Write the parsed config cache. Failures only cost speed.
+        
+        Skipped unless the config survives a JSON round trip unchanged -
+        YAML dates, NaN or non-string keys would otherwise come back
+        from the cache as something different.
+        """
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            data = _json.dumps(config)
+            if isinstance(data, str):
+                data = data.encode()
+            if _json.loads(data) != config:
+                logger.debug("Config {} isn't plain JSON data, not caching", cache_path)
+                return
+            tmp_path.write_bytes(data)
+            # Atomic, so parallel workers never read a partial file
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError) as e:
+            logger.debug("Could not write config cache {}: {}", cache_path, e)
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
     
     def create_android_driver(
         self,
@@ -60,22 +176,14 @@ class DriverManager:
         """
         logger.info("Creating Android driver...")
         
-        # Start with config file capabilities
-        caps = self.config.get('android', {}).copy()
-        
-        # Override with method parameters
-        if app_path:
-            caps['app'] = app_path
-        if device_name:
-            caps['deviceName'] = device_name
-        if custom_caps:
-            caps.update(custom_caps)
-        
-        # Set defaults if not specified
-        caps.setdefault('platformName', 'Android')
-        caps.setdefault('automationName', 'UiAutomator2')
-        caps.setdefault('deviceName', 'Android Emulator')
-        caps.setdefault('newCommandTimeout', 300)
+        # Defaults < config file < method parameters < custom caps
+        caps = {
+            **_ANDROID_DEFAULTS,
+            **self.config.get('android', {}),
+            **({'app': app_path} if app_path else {}),
+            **({'deviceName': device_name} if device_name else {}),
+            **(custom_caps or {}),
+        }
         
         # UiAutomator2 options
         options = UiAutomator2Options()
@@ -86,9 +194,17 @@ class DriverManager:
         
         try:
             self.driver = webdriver.Remote(
-                command_executor=appium_url,
+                command_executor=AppiumConnection(
+                    appium_url,
+                    keep_alive=True,
+                    init_args_for_pool_manager=_POOL_MANAGER_ARGS
+                ),
                 options=options
             )
+            # All waiting is explicit (BasePage); implicit waits only add
+            # server-side polling to every findElement call
+            self.driver.implicitly_wait(0)
+            self._prewarm()
             logger.success(f"Android driver created: {device_name or 'default device'}")
             return self.driver
         except Exception as e:
@@ -114,22 +230,14 @@ class DriverManager:
         """
         logger.info("Creating iOS driver...")
         
-        # Start with config file capabilities
-        caps = self.config.get('ios', {}).copy()
-        
-        # Override with method parameters
-        if app_path:
-            caps['app'] = app_path
-        if device_name:
-            caps['deviceName'] = device_name
-        if custom_caps:
-            caps.update(custom_caps)
-        
-        # Set defaults if not specified
-        caps.setdefault('platformName', 'iOS')
-        caps.setdefault('automationName', 'XCUITest')
-        caps.setdefault('deviceName', 'iPhone 14')
-        caps.setdefault('newCommandTimeout', 300)
+        # Defaults < config file < method parameters < custom caps
+        caps = {
+            **_IOS_DEFAULTS,
+            **self.config.get('ios', {}),
+            **({'app': app_path} if app_path else {}),
+            **({'deviceName': device_name} if device_name else {}),
+            **(custom_caps or {}),
+        }
         
         # XCUITest options
         options = XCUITestOptions()
@@ -140,15 +248,35 @@ class DriverManager:
         
         try:
             self.driver = webdriver.Remote(
-                command_executor=appium_url,
+                command_executor=AppiumConnection(
+                    appium_url,
+                    keep_alive=True,
+                    init_args_for_pool_manager=_POOL_MANAGER_ARGS
+                ),
                 options=options
             )
+            # All waiting is explicit (BasePage); implicit waits only add
+            # server-side polling to every findElement call
+            self.driver.implicitly_wait(0)
+            self._prewarm()
             logger.success(f"iOS driver created: {device_name or 'default device'}")
             return self.driver
         except Exception as e:
             logger.error(f"Failed to create iOS driver: {e}")
             raise
     
+    def _prewarm(self):
+        """
+        Send a cheap command so the first real one doesn't pay cold-start.
+        
+        The window size it returns is kept on the driver for BasePage,
+        so the first swipe doesn't have to ask for it again.
+        """
+        try:
+            self.driver._cached_window_size = self.driver.get_window_size()
+        except WebDriverException as e:
+            logger.debug("Driver pre-warm failed: {}", e)
+    
     def create_driver(
         self,
         platform: str,
@@ -159,6 +287,13 @@ class DriverManager:
         """
         Create driver for specified platform.
         
+        Sessions are pooled: if an idle session for the same config
+        file, platform, device and app was released earlier, it is
+        reused instead of starting a new one. Its app is restarted,
+        and its data cleared too unless the session has noReset set.
+        Calls with custom_caps, and sessions _is_poolable rejects,
+        always get a fresh session.
+        
         Args:
             platform: 'android' or 'ios'
             app_path: Path to app file
@@ -170,16 +305,113 @@ class DriverManager:
         """
         platform = platform.lower()
         
+        if platform not in ('android', 'ios'):
+            raise ValueError(f"Unsupported platform: {platform}")
+        
+        key = (str(self.config_path.resolve()), platform, device_name, app_path)
+        if custom_caps is None:
+            driver = self._POOL.pop(key, None)
+            if driver is not None and self._restart_app(driver):
+                logger.info(f"Reusing pooled {platform} driver")
+                self.driver = driver
+                self._pool_key = key
+                return driver
+        
         if platform == 'android':
-            return self.create_android_driver(app_path, device_name, custom_caps)
-        elif platform == 'ios':
-            return self.create_ios_driver(app_path, device_name, custom_caps)
+            self.create_android_driver(app_path, device_name, custom_caps)
         else:
-            raise ValueError(f"Unsupported platform: {platform}")
+            self.create_ios_driver(app_path, device_name, custom_caps)
+        
+        if custom_caps is None and self._is_poolable(self.driver):
+            self._pool_key = key
+        return self.driver
+    
+    @staticmethod
+    def _is_poolable(driver: webdriver.Remote) -> bool:
+        """
+        Tell whether _restart_app can give this session a clean start.
+        
+        Not poolable:
+        - no appPackage/bundleId, so the app can't be restarted
+        - fullReset sessions, which expect a reinstall every time
+        - iOS sessions that need a data wipe but have no app path to
+          reinstall from (Appium 2 drivers dropped reset())
+        """
+        caps = driver.capabilities
+        if not (get_capability(caps, 'appPackage') or get_capability(caps, 'bundleId')):
+            return False
+        if get_capability(caps, 'fullReset'):
+            return False
+        is_ios = str(get_capability(caps, 'platformName')).lower() == 'ios'
+        if is_ios and not get_capability(caps, 'noReset') and not get_capability(caps, 'app'):
+            return False
+        return True
+    
+    @staticmethod
+    def _restart_app(driver: webdriver.Remote) -> bool:
+        """
+        Bring a pooled session's app back to a fresh launch.
+        
+        Unless the session has noReset set, app data is wiped as well:
+        'mobile: clearApp' on Android (re-granting permissions after if
+        autoGrantPermissions is set, since clearing revokes them),
+        reinstalling the app on iOS.
+        
+        Returns:
+            True if the session is usable, False if it has gone away
+        """
+        _cancel_resume_timer(driver)
+        caps = driver.capabilities
+        app_id = get_capability(caps, 'appPackage') or get_capability(caps, 'bundleId')
+        clear_data = not get_capability(caps, 'noReset')
+        is_ios = str(get_capability(caps, 'platformName')).lower() == 'ios'
+        try:
+            driver.terminate_app(app_id)
+            if clear_data:
+                if is_ios:
+                    driver.remove_app(app_id)
+                    driver.install_app(get_capability(caps, 'app'))
+                else:
+                    driver.execute_script('mobile: clearApp', {'appId': app_id})
+                    if get_capability(caps, 'autoGrantPermissions'):
+                        driver.execute_script('mobile: changePermissions', {
+                            'permissions': 'all',
+                            'appPackage': app_id,
+                            'action': 'grant',
+                        })
+            driver.activate_app(app_id)
+            return True
+        except WebDriverException as e:
+            logger.warning(f"Pooled driver unusable, starting a new one: {e}")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return False
+    
+    def release_driver(self):
+        """
+        Return the driver to the pool for reuse.
+        
+        Drivers not created through create_driver (or created with
+        custom_caps) aren't poolable and are quit instead.
+        """
+        if self.driver is None:
+            return
+        _cancel_resume_timer(self.driver)
+        if self._pool_key is None or self._pool_key in self._POOL:
+            self.quit_driver()
+            return
+        
+        self._POOL[self._pool_key] = self.driver
+        logger.info("Driver returned to pool")
+        self.driver = None
+        self._pool_key = None
     
     def quit_driver(self):
         """Safely quit the driver."""
         if self.driver:
+            _cancel_resume_timer(self.driver)
             try:
                 self.driver.quit()
                 logger.info("Driver quit successfully")
@@ -187,11 +419,25 @@ class DriverManager:
                 logger.warning(f"Error quitting driver: {e}")
             finally:
                 self.driver = None
+                self._pool_key = None
+    
+    @classmethod
+    def shutdown_all(cls):
+        """Quit every pooled driver. Registered to run at exit."""
+        while cls._POOL:
+            _, driver = cls._POOL.popitem()
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.warning(f"Error quitting pooled driver: {e}")
     
     def __enter__(self):
         """Context manager entry."""
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - ensures driver cleanup."""
-        self.quit_driver()
+        """Context manager exit - hands the driver back to the pool."""
+        self.release_driver()
+
+
+atexit.register(DriverManager.shutdown_all)
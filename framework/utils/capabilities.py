@@ -0,0 +1,26 @@
+"""
+Capability Helpers
+Reading values out of Appium session capabilities
+"""
+
+from typing import Any
+
+
+def get_capability(caps: dict, name: str, default: Any = None) -> Any:
+    """
+    Look up a capability by name, with or without the 'appium:' prefix.
+
+    Session capabilities come back prefixed or not depending on the
+    driver, so check both.
+
+    Args:
+        caps: Capabilities dict (e.g. driver.capabilities)
+        name: Unprefixed capability name like 'appPackage'
+        default: Returned when neither form is present
+
+    Returns:
+        Capability value or default
+    """
+    if name in caps:
+        return caps[name]
+    return caps.get(f'appium:{name}', default)